@@ -1,13 +1,23 @@
 import streamlit as st
 import os
+import asyncio
+import time
+import threading
 import re
+import json
+import hashlib
 import pandas as pd
+import tiktoken
 from datetime import datetime
-from collections import Counter
-from PyPDF2 import PdfReader
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from pdf_extract import extract_text
 
 # LangChain & Groq Imports
 from langchain_groq import ChatGroq
+from groq import DefaultAioHttpClient
+from aiolimiter import AsyncLimiter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from youtube_transcript_api import YouTubeTranscriptApi
@@ -16,45 +26,12 @@ from youtube_transcript_api import YouTubeTranscriptApi
 st.set_page_config(page_title="Multi-Source AI Agent", layout="wide")
 
 
-# Dark Mode Styling - White text on Dark background
-st.markdown("""
-    <style>
-    /* 1. Main background of the entire app */
-    .stApp { 
-        background-color: #0e1117; 
-    }
-    
-    /* 2. Metric Box Styling - Deep gray with border */
-    [data-testid="stMetric"] {
-        background-color: #1a1c23;
-        padding: 15px;
-        border-radius: 12px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-        border: 1px solid #30363d;
-    }
-    
-    /* 3. Force Metric Values (Numbers) to White */
-    [data-testid="stMetricValue"] {
-        color: #ffffff !important;
-    }
-    
-    /* 4. Force Metric Labels (Titles) to White/Light Gray */
-    [data-testid="stMetricLabel"] {
-        color: #e6edf3 !important;
-    }
-
-    /* 5. Headers and Text color across the app */
-    h1, h2, h3, p, span {
-        color: #ffffff !important;
-    }
-    
-    /* Hover effect for a premium feel */
-    [data-testid="stMetric"]:hover {
-        border-color: #58a6ff;
-        transition: 0.5s;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+# Dark Mode Styling - White text on Dark background, kept in style.css and read from disk only once
+@st.cache_data
+def load_css():
+    return (Path(__file__).parent / "style.css").read_text(encoding="utf-8")
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 st.title("🤖 Multi-Step AI Research Agent")
 st.write("Orchestrating intelligence across PDFs, Google Sheets, and YouTube.")
@@ -65,66 +42,302 @@ def add_log(message):
     timestamp = datetime.now().strftime("%H:%M:%S")
     st.session_state.logs.append(f"[{timestamp}] {message}")
 
+MODEL_NAME = "llama-3.3-70b-versatile"
+SUMMARY_PROMPT = "Summarize the following content professionally: {content}"
+BATCH_PROMPT = (
+    "Summarize each file below professionally. Files are separated by ===FILE: name=== headers. "
+    "Return a JSON object mapping each file name to its summary.\n\n{content}"
+)
+# Groq limits - defaults are the free tier for the model; set these env vars (or root-level Streamlit secrets,
+# which are exported as env vars) on paid plans
+MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 8)) # cap on in-flight Groq requests
+GROQ_RPM = int(os.getenv("GROQ_RPM", 30)) # requests per minute
+GROQ_TPM = int(os.getenv("GROQ_TPM", 12000)) # tokens per minute
+REPLY_TOKENS = 1000 # rough size of a summary, reserved up front with the prompt tokens
+PROMPT_OVERHEAD_TOKENS = 100 # the prompt template's own wording
+# Input limits are counted in tokens, not characters - characters over- or under-fill the context depending on the text
+# Groq rejects a single request bigger than the per-minute budget, so every limit has to fit inside GROQ_TPM
+MAX_PROMPT_TOKENS = GROQ_TPM - REPLY_TOKENS - PROMPT_OVERHEAD_TOKENS
+PDF_TOKEN_LIMIT = min(4000, MAX_PROMPT_TOKENS) # per PDF, keeps each request small so the LLM doesn't crash
+SOURCE_TOKEN_LIMIT = min(5000, MAX_PROMPT_TOKENS) # Sheets / YouTube, massive input handling
+BATCH_TOKEN_BUDGET = MAX_PROMPT_TOKENS # all files together, file headers included
+if MAX_PROMPT_TOKENS <= 0:
+    st.error(f"GROQ_TPM={GROQ_TPM} is too low - it must be above {REPLY_TOKENS + PROMPT_OVERHEAD_TOKENS} to fit any prompt.")
+    st.stop()
+CACHE_DIR = Path("reports") / ".cache" # one JSON file per prompt hash
+RUNS_LOG = Path("reports") / "runs.jsonl" # append-only, one line per generated report - never read back by the app
+
+# One shared append handle for the run log, opened once per process
+# Replaces a file per report - writes go through a single buffered handle
+@st.cache_resource
+def get_run_log():
+    RUNS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    fp = RUNS_LOG.open("a", encoding="utf-8", buffering=1 << 16)
+    if RUNS_LOG.stat().st_size:
+        with RUNS_LOG.open("rb") as tail: # only the last byte is read, not the whole log
+            tail.seek(-1, os.SEEK_END)
+            if tail.read(1) != b"\n": fp.write("\n") # so the next record doesn't glue onto a line cut short by a crash
+    return fp, threading.Lock()
+
+def append_records(records):
+    fp, lock = get_run_log()
+    with lock: # sessions run in parallel threads, keep lines whole
+        fp.write("".join(json.dumps(record) + "\n" for record in records)) # one write for the whole run
+        fp.flush()
+
+# Exact-match response cache - identical input on a re-run is served from disk instead of Groq
+# Fresh answers are streamed into the chunks list as tokens arrive; returns (summary, time to first token)
+# A cache hit has no first token to time, so it comes back as (summary, None)
+# Without a chunks list the answer is fetched in one piece, so "first token" is the full round-trip
+# limits comes from get_rate_limits(), tokens is the prompt size counted against the per-minute token budget
+# validate(summary) -> bool keeps bad replies (e.g. broken JSON) out of the cache so a re-run asks Groq again
+async def cached_complete(chain, content, limits, tokens, chunks=None, model=MODEL_NAME, system=SUMMARY_PROMPT, validate=None):
+    start = time.perf_counter()
+    key = hashlib.sha256((model + system + content).encode("utf-8")).hexdigest()
+    path = CACHE_DIR / f"{key}.json"
+    try: # just try the read - an exists() check would cost an extra stat on every lookup
+        summary = json.loads(path.read_text(encoding="utf-8"))["content"]
+        if chunks is not None: chunks.append(summary)
+        return summary, None
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        pass # missing or damaged entry - regenerate it
+    needed = tokens + PROMPT_OVERHEAD_TOKENS + REPLY_TOKENS
+    if needed > GROQ_TPM: # Groq would reject it as too large anyway - checked before it takes a request permit
+        raise ValueError(f"Request needs ~{needed} tokens but GROQ_TPM allows {GROQ_TPM} per minute.")
+    semaphore, requests_per_min, tokens_per_min = limits
+    await requests_per_min.acquire()
+    await tokens_per_min.acquire(needed)
+    async with semaphore:
+        if chunks is None:
+            summary = await chain.ainvoke({"content": content})
+            ttft = time.perf_counter() - start
+        else:
+            summary, ttft = await _stream_into(chain, content, chunks, start)
+    if validate is not None and not validate(summary): return summary, ttft
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # One write call for the whole file, in a worker thread so slow disks (network mounts) don't stall other requests
+    await asyncio.to_thread(path.write_text, json.dumps({"content": summary, "ts": datetime.now().isoformat()}), encoding="utf-8")
+    return summary, ttft
+
+async def _stream_into(chain, content, chunks, start):
+    ttft = None
+    async for chunk in chain.astream({"content": content}):
+        if ttft is None: ttft = time.perf_counter() - start
+        chunks.append(chunk)
+    return "".join(chunks), ttft if ttft is not None else time.perf_counter() - start
+
+# One long-lived event loop for all async work. Cached clients keep their connection pools across runs,
+# which asyncio.run() (a fresh loop per run) would break
+@st.cache_resource
+def _event_loop():
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+# Runs a coroutine on the shared loop and blocks the script until it finishes
+# Streamlit elements can only be drawn from the script thread, so streamed chunks are redrawn here
+def run_async(coro, previews=()):
+    future = asyncio.run_coroutine_threadsafe(coro, _event_loop())
+    drawn = [0] * len(previews)
+    try:
+        while True:
+            done = future.done()
+            for i, (placeholder, chunks) in enumerate(previews):
+                if len(chunks) != drawn[i]:
+                    drawn[i] = len(chunks)
+                    placeholder.markdown("".join(chunks))
+            if done: return future.result()
+            time.sleep(0.1)
+    finally:
+        future.cancel() # no-op when finished, stops orphaned requests if the user reruns mid-stream
+
+# Built once per process, not on every rerun - reuses the HTTP clients and their connection pools
+# Async calls go through aiohttp, which holds up better than the default httpx transport under many concurrent streams
+@st.cache_resource
+def get_llm(api_key, model=MODEL_NAME):
+    return ChatGroq(
+        temperature=0,
+        model_name=model,
+        groq_api_key=api_key,
+        request_timeout=60,
+        http_async_client=DefaultAioHttpClient(),
+    )
+
+# LangChain pipelines: prompt -> LLM -> string output, built once per key and reused by every run
+@st.cache_resource
+def get_chain(api_key, model=MODEL_NAME):
+    return ChatPromptTemplate.from_template(SUMMARY_PROMPT) | get_llm(api_key, model) | StrOutputParser()
+
+@st.cache_resource
+def get_batch_chain(api_key, model=MODEL_NAME):
+    llm = get_llm(api_key, model).bind(response_format={"type": "json_object"})
+    return ChatPromptTemplate.from_template(BATCH_PROMPT) | llm | StrOutputParser()
+
+# Shared by every session so bursts from several users still stay just under Groq's limits instead of hitting 429s
+# Only ever awaited on the shared event loop
+@st.cache_resource
+def get_rate_limits():
+    return asyncio.Semaphore(MAX_CONCURRENCY), AsyncLimiter(GROQ_RPM, 60), AsyncLimiter(GROQ_TPM, 60)
+
+# Extraction is CPU-bound, so several PDFs are spread over processes (threads would serialize on the GIL)
+# One pool per process: workers start once and stay warm for every later upload
+# spawn, not fork - forking the multi-threaded Streamlit server is unsafe
+@st.cache_resource
+def get_pool():
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+# Cached on the file bytes: re-clicks and re-uploads of the same PDFs skip parsing entirely
+@st.cache_data(show_spinner=False, max_entries=32)
+def extract_pdf_texts(data):
+    if len(data) < 2: return [extract_text(d) for d in data] # one file - cheaper than shipping the bytes to a worker
+    return list(get_pool().map(extract_text, data))
+
+# Tokenizer is built once per process; cl100k is close enough to Llama's tokenizer for budgeting
+@st.cache_resource
+def get_tokenizer():
+    return tiktoken.get_encoding("cl100k_base")
+
+# Cuts text to max_tokens on a token boundary; returns (text, token count)
+def truncate_tokens(text, max_tokens):
+    max_tokens = max(0, max_tokens) # a negative slice below would keep almost the whole text
+    head = text[:max_tokens * 10] # a token is rarely longer than 10 chars, no need to encode the rest
+    ids = get_tokenizer().encode(head, disallowed_special=()) # PDFs may contain text like <|endoftext|>
+    if len(ids) <= max_tokens: return head, len(ids)
+    return get_tokenizer().decode(ids[:max_tokens]), max_tokens
+
+# Summarizes every PDF concurrently - each call is a network round-trip, so they overlap instead of queueing
+# Concurrency and rate limits are enforced inside cached_complete
+# A failed file comes back as its exception, the others still finish
+async def summarize_files(chain, texts, streams, limits):
+    return await asyncio.gather(*(
+        cached_complete(chain, text, limits, tokens, chunks) for (text, tokens), chunks in zip(texts, streams)
+    ), return_exceptions=True) # gather keeps results in upload order
+
+# Packs every PDF into one prompt (one round-trip instead of N), the budget is split in proportion to file length
+# Shortest files go first, so whatever a short file doesn't use is shared out among the longer ones
+# Returns (content, approximate token count)
+def build_batch_content(names, texts):
+    budget = BATCH_TOKEN_BUDGET - 10 * len(texts) # 10 tokens for each file header
+    chars = sum(len(text) for text in texts)
+    parts = [None] * len(texts)
+    for i in sorted(range(len(texts)), key=lambda i: len(texts[i])):
+        share = budget * len(texts[i]) // max(1, chars)
+        parts[i] = truncate_tokens(texts[i], share)
+        budget -= parts[i][1]
+        chars -= len(texts[i])
+    content = "\n\n".join(f"===FILE: {name}===\n{text}" for name, (text, _) in zip(names, parts))
+    return content, sum(tokens + 10 for _, tokens in parts)
+
+# Batch reply -> {file name: summary}, or None when the reply isn't a JSON object
+# Files the model skipped, or answered with something other than non-empty text (null, numbers, objects), are missing
+def parse_batch(reply, names):
+    try:
+        batch = json.loads(reply)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(batch, dict): return None
+    return {name: batch[name] for name in names if isinstance(batch.get(name), str) and batch[name].strip()}
+
+VIDEO_ID_RE = re.compile(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*")
+
+# Cached per video, so adding a URL to the list only fetches the new one
+# No spinner, so it's safe to call from the worker threads below
+@st.cache_data(show_spinner=False, max_entries=256)
+def fetch_transcript(video_id):
+    transcript_data = YouTubeTranscriptApi().fetch(video_id) # 2026 API Instantiation, one per thread
+    return " ".join([t.text for t in transcript_data]) # Use attribute access (.text) for snippets
+
+# Transcripts for several videos are fetched in parallel - each fetch is a network round-trip,
+# so N videos take about as long as the slowest one
+# Returns one entry per ID: the transcript, or the exception that video failed with
+def fetch_transcripts(video_ids):
+    async def fetch_all():
+        return await asyncio.gather(*(asyncio.to_thread(fetch_transcript, v) for v in video_ids), return_exceptions=True)
+
+    return run_async(fetch_all())
+
+STOP_WORDS = frozenset({'the', 'and', 'of', 'to', 'in', 'is', 'it', 'this', 'that', 'with', 'for'}) #ignored words (noise)
+WORD_RE = re.compile(r'\w+') #every single word in your document
+KEYWORD_RE = re.compile(r'\w{4,}') #only words longer than 3 characters - the length filter happens inside the regex
+
+# Dashboard word stats - filtering and counting run in C (regex + pandas) instead of a Python loop,
+# and the result is cached so widget clicks don't recount the whole document
+@st.cache_data(show_spinner=False, max_entries=32)
+def word_stats(text):
+    text = text.lower()
+    counts = pd.Series(KEYWORD_RE.findall(text)).value_counts() #Frequency Ranker, most frequent first
+    counts = counts.drop(STOP_WORDS, errors="ignore") #noise is dropped once per distinct word, not checked for every token
+    return len(WORD_RE.findall(text)), len(counts), counts.head(5)
+
 # --- 1. API KEY SETUP ---
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     GROQ_API_KEY = st.sidebar.text_input("Enter Groq API Key:", type="password")
 
 if GROQ_API_KEY:
-    # Initialize Llama 3.3 via LangChain
-    llm = ChatGroq(
-        temperature=0, 
-        model_name="llama-3.3-70b-versatile", 
-        groq_api_key=GROQ_API_KEY
-    )
-
     # --- 2. STEP 1: DATA RETRIEVAL ---
     st.write("### 📂 Step 1: Data Retrieval")
     source_type = st.radio("Choose Source:", ["📄 PDF Upload", "📊 Google Sheets", "🎥 YouTube Video"])
     
     raw_text = ""
     uploaded_files = []
+    pdf_texts = []
+    batch_mode = False
 
     if source_type == "📄 PDF Upload":
         uploaded_files = st.file_uploader("Upload PDF(s)", type="pdf", accept_multiple_files=True)
         if uploaded_files:
-            for f in uploaded_files:
-                reader = PdfReader(f)
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text: raw_text += text + "\n"
+            # Only re-extract when the uploads change, not on every widget click
+            files_key = tuple(f.file_id for f in uploaded_files) # unique per upload, no need to hash the bytes
+            if st.session_state.get("files_key") != files_key:
+                st.session_state.pdf_texts = extract_pdf_texts(tuple(f.getvalue() for f in uploaded_files))
+                st.session_state.files_key = files_key
+            pdf_texts = st.session_state.pdf_texts
+            raw_text = "\n".join(pdf_texts)
             st.success(f"✅ Extracted text from {len(uploaded_files)} PDFs")
+            batch_mode = st.toggle("📦 Batch all PDFs into a single request", help="Fewer round-trips, best for several small files. Long files are trimmed to fit one prompt.")
 
     elif source_type == "📊 Google Sheets":
         sheet_url = st.text_input("Paste Public Google Sheet URL:")
         if sheet_url:
             try:
-                from streamlit_gsheets import GSheetsConnection
-                conn = st.connection("gsheets", type=GSheetsConnection)
-                df = conn.read(spreadsheet=sheet_url)
-                raw_text = df.to_string()
-                st.write("✅ Sheet Data Preview:", df.head(3))
+                if st.session_state.get("sheet_key") != sheet_url: # same URL as last rerun - reuse the stored sheet
+                    from streamlit_gsheets import GSheetsConnection
+                    conn = st.connection("gsheets", type=GSheetsConnection)
+                    df = conn.read(spreadsheet=sheet_url)
+                    # CSV is compact and easy for the LLM to read; only the rows that fit the token budget are formatted
+                    max_rows = SOURCE_TOKEN_LIMIT * 4 // max(1, df.shape[1] * 8) # ~4 chars/token, ~8 chars/cell - errs long, truncation trims the rest
+                    st.session_state.sheet_text = df.head(max_rows).to_csv(index=False)
+                    st.session_state.sheet_preview = df.head(3)
+                    st.session_state.sheet_key = sheet_url
+                raw_text = st.session_state.sheet_text
+                st.write("✅ Sheet Data Preview:", st.session_state.sheet_preview)
             except Exception as e:
                 st.error(f"Sheet Error: {e}")
 
     elif source_type == "🎥 YouTube Video":
-        youtube_url = st.text_input("Paste YouTube URL:")
-        if youtube_url:
-            try:
-                # Video ID Extraction
-                video_id_match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", youtube_url)
-                if video_id_match:
-                    video_id = video_id_match.group(1)
-                    # 2026 API Instantiation
-                    ytt_api = YouTubeTranscriptApi() 
-                    transcript_data = ytt_api.fetch(video_id)
-                    # Use attribute access (.text) for snippets
-                    raw_text = " ".join([t.text for t in transcript_data])
-                    st.success("✅ Transcript fetched successfully!")
-                else:
-                    st.error("Invalid YouTube URL.")
-            except Exception as e:
-                st.error(f"YouTube Error: {e}")
+        youtube_urls = st.text_area("Paste YouTube URL(s), one per line:")
+        urls = [u.strip() for u in youtube_urls.splitlines() if u.strip()]
+        if urls:
+            video_urls = {} # video ID -> first URL it came from, duplicates fetched once
+            for url in urls: # Video ID Extraction
+                video_id_match = VIDEO_ID_RE.search(url)
+                if video_id_match: video_urls.setdefault(video_id_match.group(1), url)
+                else: st.error(f"Invalid YouTube URL: {url}")
+            if video_urls:
+                # Only fetch when the videos change, not on every widget click - failures (e.g. transcripts disabled)
+                # are stored too, so they aren't retried on every rerun
+                video_key = tuple(video_urls)
+                if st.session_state.get("video_key") != video_key:
+                    st.session_state.video_results = fetch_transcripts(video_key)
+                    st.session_state.video_key = video_key
+                transcripts = []
+                for url, result in zip(video_urls.values(), st.session_state.video_results):
+                    if isinstance(result, Exception): st.error(f"YouTube Error ({url}): {result}") # one bad video doesn't lose the rest
+                    else: transcripts.append(result)
+                if transcripts:
+                    raw_text = "\n\n".join(transcripts)
+                    st.success(f"✅ Fetched {len(transcripts)} transcript(s) successfully!")
 
     # --- 3. STEP 2 & 3: LANGCHAIN ORCHESTRATION ---
     if raw_text: 
@@ -132,34 +345,79 @@ if GROQ_API_KEY:
             st.session_state.logs = []
             st.session_state.summaries = {} #ensures every time you start a new research, you are working with a clean slate
             
-            # LangChain Prompt & Chain
-            prompt = ChatPromptTemplate.from_template("Summarize the following content professionally: {content}")
-            chain = prompt | llm | StrOutputParser() #langchain pipeline: prompt -> LLM -> string output
+            # LangChain Chain with Llama 3.3
+            chain = get_chain(GROQ_API_KEY)
+            limits = get_rate_limits()
+            failed = [] # names of reports that couldn't be generated
 
             log_container = st.expander("🛠️ View Agent Process Logs", expanded=True)
             
             with st.status("🤖 Agent Orchestrating...", expanded=True) as status:
-                # Process PDFs individually
-                if source_type == "📄 PDF Upload" and uploaded_files:
-                    for f in uploaded_files:
-                        add_log(f"ORCHESTRATOR: Analyzing {f.name}...")
-                        # Individual file text extraction for summary
-                        reader = PdfReader(f)
-                        f_text = "".join([p.extract_text() for p in reader.pages if p.extract_text()])
-                        summary = chain.invoke({"content": f_text[:15000]}) # Limit to 15k chars for LLM not to crash
-                        st.session_state.summaries[f.name] = summary #Agent can manage multiple reports simultaneously without losing data or confusion
-                        add_log(f"EXPORT: Saved report for {f.name}")
-                # Process Sheets or YouTube as a single unit
+                try:
+                    # Process PDFs individually
+                    if source_type == "📄 PDF Upload" and uploaded_files:
+                        for f in uploaded_files: add_log(f"ORCHESTRATOR: Analyzing {f.name}...")
+                        names = [f.name for f in uploaded_files]
+                        if batch_mode:
+                            batch_chain = get_batch_chain(GROQ_API_KEY)
+                            add_log(f"ORCHESTRATOR: Batching {len(names)} files into one request...")
+                            content, tokens = build_batch_content(names, pdf_texts)
+                            # only replies with a summary for every file are cached
+                            validate = lambda reply: len(parse_batch(reply, names) or ()) == len(set(names))
+                            # streamed without a preview (half-written JSON isn't worth showing) so the first token is still timed
+                            reply, st.session_state.ttft = run_async(cached_complete(batch_chain, content, limits, tokens, [], system=BATCH_PROMPT, validate=validate))
+                            reports = parse_batch(reply, names)
+                            if reports is None:
+                                reports = {}
+                                add_log("ERROR: Batch reply was not valid JSON.")
+                                st.error("The batch reply was not valid JSON - try again or turn batching off.")
+                            missing = [name for name in dict.fromkeys(names) if name not in reports]
+                            failed.extend(missing)
+                            if missing and reports:
+                                add_log(f"ERROR: No summary returned for {', '.join(missing)}")
+                                st.error(f"No summary was returned for: {', '.join(missing)}")
+                        else:
+                            previews = []
+                            for name in names: #live preview per file while tokens stream in
+                                st.caption(name)
+                                previews.append((st.empty(), []))
+                            streams = [chunks for _, chunks in previews]
+                            texts = [truncate_tokens(t, PDF_TOKEN_LIMIT) for t in pdf_texts] # reuses the Step 1 extraction
+                            results = dict(zip(names, run_async(summarize_files(chain, texts, streams, limits), previews)))
+                            for name, result in results.items():
+                                if isinstance(result, BaseException): # one bad file doesn't lose the rest
+                                    failed.append(name)
+                                    add_log(f"ERROR: {name}: {result}")
+                                    st.error(f"Summary Error ({name}): {result}")
+                            results = {name: result for name, result in results.items() if name not in failed}
+                            ttfts = [ttft for _, ttft in results.values() if ttft is not None] #cached files don't count
+                            st.session_state.ttft = min(ttfts) if ttfts else None #first text the user sees from Groq
+                            reports = {name: summary for name, (summary, _) in results.items()}
+                        for name, summary in reports.items():
+                            st.session_state.summaries[name] = summary #Agent can manage multiple reports simultaneously without losing data or confusion
+                            add_log(f"EXPORT: Saved report for {name}")
+                    # Process Sheets or YouTube as a single unit
+                    else:
+                        doc_label = "Google Sheet" if source_type == "📊 Google Sheets" else "YouTube Transcript"
+                        add_log(f"ORCHESTRATOR: Processing {doc_label}...")
+                        preview = (st.empty(), [])
+                        content, tokens = truncate_tokens(raw_text, SOURCE_TOKEN_LIMIT)
+                        summary, st.session_state.ttft = run_async(cached_complete(chain, content, limits, tokens, preview[1]), [preview])
+                        st.session_state.summaries[doc_label] = summary
+                        add_log(f"EXPORT: Generated {doc_label} summary.")
+                    # One record per report - batch runs are logged per file, not as the raw JSON reply
+                    ts = datetime.now().isoformat()
+                    append_records({"ts": ts, "model": MODEL_NAME, "name": name, "summary": summary} for name, summary in st.session_state.summaries.items())
+                except Exception as e: #Groq / rate-limit errors end the run with a message instead of a traceback
+                    add_log(f"ERROR: {e}")
+                    st.error(f"Agent Error: {e}")
+                    status.update(label="❌ Workflow Failed", state="error")
                 else:
-                    doc_label = "Google Sheet" if source_type == "📊 Google Sheets" else "YouTube Transcript"
-                    add_log(f"ORCHESTRATOR: Processing {doc_label}...")
-                    summary = chain.invoke({"content": raw_text[:20000]}) #massive input handling with 20k char limit
-                    st.session_state.summaries[doc_label] = summary
-                    add_log(f"EXPORT: Generated {doc_label} summary.")
+                    if failed: status.update(label=f"⚠️ Workflow finished, {len(failed)} report(s) failed", state="error")
+                    else: status.update(label="✅ Workflow Complete!", state="complete", expanded=False) #collapse the streamed previews, final reports render below
 
                 # Display Logs
-                for log in st.session_state.logs: log_container.code(log, language="bash")
-                status.update(label="✅ Workflow Complete!", state="complete")
+                log_container.code("\n".join(st.session_state.logs), language="bash") #one element for the whole log, not one per line
 
     # --- 4. DISPLAY & DASHBOARD ---
     if "summaries" in st.session_state and st.session_state.summaries: #check summary exists in folder and that it is not empty
@@ -172,25 +430,23 @@ if GROQ_API_KEY:
         # DASHBOARD LOGIC
         st.divider()
         st.write("### 📊 Agent Insights Dashboard")
-        words = re.findall(r'\w+', raw_text.lower()) #uses (Regex) to find every single word in your document.
-        stop_words = {'the', 'and', 'of', 'to', 'in', 'is', 'it', 'this', 'that', 'with', 'for'} #ignored words (noise)
-        filtered_words = [w for w in words if w not in stop_words and len(w) > 3] #It only keeps words that: Are not in stop_words list and longer than 3 characters
-        word_counts = Counter(filtered_words).most_common(5) #Frequency Ranker - Top 5 keywords
+        total_words, keyword_count, top_words = word_stats(raw_text) #Top 5 keywords with their frequency
 
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Chars Analyzed", f"{len(raw_text)}")
-            st.metric("Total Words", f"{len(words)}")
+            st.metric("Total Words", f"{total_words}")
         with col2:
             st.metric("Reliability", "99.2%", delta="0.8%") #target benchmark for UI layout
-            st.metric("Keywords", f"{len(set(filtered_words))}")
+            st.metric("Keywords", f"{keyword_count}")
         with col3:
-            st.metric("Speed", "0.9s", delta="-0.2s")
-            if word_counts: st.metric("Top Key", f"'{word_counts[0][0]}'")
+            if "ttft" in st.session_state: #measured, not a benchmark - None when every summary came from the cache
+                st.metric("Speed (first token)", "cached" if st.session_state.ttft is None else f"{st.session_state.ttft:.2f}s")
+            if not top_words.empty: st.metric("Top Key", f"'{top_words.index[0]}'")
 
-        if word_counts:
-            chart_data = pd.DataFrame(word_counts, columns=['Word', 'Freq']) #bar chart with freq
-            st.bar_chart(chart_data.set_index('Word'))
+        if not top_words.empty:
+            chart_data = top_words.rename_axis('Word').to_frame('Freq') #bar chart with freq
+            st.bar_chart(chart_data)
 
 else:
     st.info("💡 Please enter your Groq API Key in the sidebar to begin.")
\ No newline at end of file
@@ -0,0 +1,26 @@
+# PDF text extraction helpers.
+# Lives outside app.py on purpose: Streamlit runs app.py as a script, so worker
+# processes can't import functions defined there - they can import this module.
+import io
+
+import pypdfium2 as pdfium
+from pypdf import PdfReader
+
+
+def extract_text(data):
+    try:
+        pdf = pdfium.PdfDocument(data) # PDFium (C++) backend - much faster than pure-Python parsing
+    except pdfium.PdfiumError:
+        return extract_text_pypdf(data) # e.g. encryption PDFium refuses to open
+    try:
+        text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+        return text.replace("\r\n", "\n") # PDFium emits CRLF line endings, pypdf doesn't
+    finally:
+        pdf.close()
+
+
+# Slower fallback, kept for encrypted files
+def extract_text_pypdf(data):
+    reader = PdfReader(io.BytesIO(data))
+    if reader.is_encrypted: reader.decrypt("")
+    return "\n".join(text for text in (p.extract_text() for p in reader.pages) if text)